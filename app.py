@@ -4,7 +4,7 @@ import time
 import ast
 import json
 from datetime import datetime, timedelta
-from users import check_login, create_user_page, get_mongo_client, register_user, login_user
+from users import check_login, create_user_page, get_mongo_client, register_user, login_user, forget_verified_logins
 
 # Import agentic intelligence features
 try:
@@ -15,7 +15,7 @@ except ImportError:
 
 # Import fitness agent features
 try:
-    from fitness_agent import get_fitness_insight, get_activity_recommendation, get_calorie_based_meal_suggestion, calculate_bmi, calculate_daily_calories, save_fitness_goals, get_fitness_goals, save_fitness_meal_rating, get_fitness_meal_insights, generate_gemini_fitness_suggestions
+    from fitness_agent import get_fitness_insight, get_activity_recommendation, get_calorie_based_meal_suggestion, calculate_bmi, calculate_daily_calories, save_fitness_goals, get_fitness_goals, save_fitness_meal_ratings_bulk, get_fitness_meal_insights, generate_gemini_fitness_suggestions
     FITNESS_AGENT_AVAILABLE = True
 except ImportError:
     FITNESS_AGENT_AVAILABLE = False
@@ -43,7 +43,11 @@ def fetch_history_from_db(user_id):
     client = get_mongo_client()
     db = client["food_agent_db"]
     collection = db["food_choices"]
-    return list(collection.find({"user_id": user_id}).sort("timestamp", -1))
+    # Only the fields the history views and prompts read
+    return list(collection.find(
+        {"user_id": user_id},
+        {"food": 1, "rating": 1, "category": 1, "comments": 1, "timestamp": 1, "_id": 0}
+    ).sort("timestamp", -1))
 
 
 # ======================================================================================
@@ -436,6 +440,7 @@ def main_app():
         
         st.markdown("---")
         if st.button("🚪 Logout", use_container_width=True, key="logout_button"):
+            forget_verified_logins(st.session_state.current_user)
             st.session_state.is_authenticated = False
             st.session_state.current_user = None
             st.rerun()
@@ -800,7 +805,7 @@ def main_app():
                     
                     # Save all ratings at once (no rerun until done)
                     if st.button("💾 Save All Ratings", key="save_all_fitness_ratings"):
-                        saved_count = 0
+                        meal_data_list = []
                         for i, suggestion in enumerate(st.session_state.meal_suggestions['suggestions']):
                             rating_key = f"fitness_meal_rating_{i}"
                             comments_key = f"fitness_meal_comments_{i}"
@@ -815,8 +820,8 @@ def main_app():
                                 'focus': suggestion['focus'],
                                 'target_calories': st.session_state.calorie_data['target_calories']
                             }
-                            if save_fitness_meal_rating(target_user_id, get_mongo_client(), meal_data):
-                                saved_count += 1
+                            meal_data_list.append(meal_data)
+                        saved_count = save_fitness_meal_ratings_bulk(target_user_id, get_mongo_client(), meal_data_list)
                         st.success(f"Saved {saved_count} ratings! Your agent is learning from your feedback.")
                         # Keep suggestions on screen for more actions; no rerun here
                 else:
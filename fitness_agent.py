@@ -6,35 +6,60 @@ This module provides fitness-related insights and activity-based meal recommenda
 by analyzing user activity data and communicating with the food agent.
 """
 
+import logging
+import re
 import time
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Any
 import ast
 import json
 import google.generativeai as genai
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 
-def generate_gemini_fitness_suggestions(user_id: str, mongo_client, meal_type: str, cuisine_preference: str, min_cals: float, max_cals: float, food_choices_history: list) -> list:
-    """
-    Use Gemini to generate meal suggestions conditioned on cuisine, meal type, calorie band and user history.
-    Returns a list of {dish, estimated_cals, focus} dicts.
-    """
-    # Build a concise, structured prompt for JSON output
-    # Extract a short recent history snippet to ground the model
-    recent_history_lines = []
-    for item in food_choices_history[:8]:
-        recent_history_lines.append(f"Dish: {item.get('food','')}, Rating: {item.get('rating',5)}/10, Category: {item.get('category','')}, Comments: {item.get('comments','')}")
-    recent_history_text = "\n".join(recent_history_lines) if recent_history_lines else "None"
+# orjson is optional; fall back to the standard library parser when it isn't installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-    cuisine_text = cuisine_preference if cuisine_preference and cuisine_preference != "Any" else "Any/Generic"
+# Markdown code fence (optionally tagged json) that Gemini tends to wrap JSON output in
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+def _parse_llm_json(raw_text: str):
+    """Parse model output as JSON, falling back to a Python literal for single-quoted output."""
+    try:
+        return _json_loads(raw_text)
+    except ValueError:
+        # Only the occasional Python-style reply pays for the slower literal parser
+        return ast.literal_eval(raw_text)
 
-    prompt = f"""
+# Shared worker threads for overlapping blocking Mongo reads with local work
+_BACKGROUND_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fitness-agent")
+
+@lru_cache(maxsize=16)
+def _get_collection(mongo_client, name: str):
+    """Resolve (and reuse) a food_agent_db collection handle for this client."""
+    # Indexes backing these queries are created once in users.get_mongo_client
+    return mongo_client["food_agent_db"][name]
+
+# Static part of the Gemini meal prompt; only the placeholders change between calls
+_FITNESS_PROMPT_TEMPLATE = """
     You are a nutrition-forward vegetarian meal planner. Generate diverse, non-repetitive meal ideas.
 
     Constraints:
     - Vegetarian only, no eggs. Prefer gravies/soups over whole vegetables when reasonable.
     - Meal type: {meal_type}
     - Cuisine focus: {cuisine_text}
-    - Estimated calories MUST be within [{int(min_cals)}, {int(max_cals)}].
+    - Estimated calories MUST be within [{min_cals}, {max_cals}].
     - Consider the user's highly-rated items and avoid poorly-rated ones.
     - Keep names approachable for home cooking in India.
 
@@ -49,39 +74,113 @@ def generate_gemini_fitness_suggestions(user_id: str, mongo_client, meal_type: s
     }}
     """
 
+# Structured-output config so Gemini returns a bare JSON array of suggestions
+_FITNESS_SUGGESTION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "dish": {"type": "string"},
+                "estimated_cals": {"type": "integer"},
+                "focus": {"type": "string"}
+            },
+            "required": ["dish", "estimated_cals", "focus"]
+        }
+    }
+}
+
+@lru_cache(maxsize=1)
+def _get_gemini_model():
+    """Build the Gemini model handle once and share it across calls."""
+    return genai.GenerativeModel('gemini-2.5-flash-preview-05-20', generation_config=_FITNESS_SUGGESTION_CONFIG)
+
+# Seconds a Gemini answer may be reused; the window index is part of the cache key, so entries age out
+_GEMINI_CACHE_TTL = 3600
+
+@lru_cache(maxsize=512)
+def _generate_gemini_suggestions_cached(meal_type: str, cuisine_text: str, min_cals: int, max_cals: int, recent_history_text: str, ttl_window: int, ratings_generation: int) -> tuple:
+    """Ask Gemini for suggestions; memoized on the prompt inputs, TTL window and rating saves, and raises instead of caching failures."""
+    prompt = _FITNESS_PROMPT_TEMPLATE.format(
+        meal_type=meal_type,
+        cuisine_text=cuisine_text,
+        min_cals=min_cals,
+        max_cals=max_cals,
+        recent_history_text=recent_history_text
+    )
+
+    response = _get_gemini_model().generate_content(prompt)
+    if not response or not getattr(response, 'text', None):
+        raise ValueError("Empty Gemini response")
+    # JSON mode returns a bare array; the fence strip and lenient parse are cheap no-ops then
+    raw_text = _FENCE_RE.sub('', response.text)
+    data = _parse_llm_json(raw_text)
+    if not isinstance(data, list):
+        raise ValueError("Gemini response is not a JSON array")
+    cleaned = []
+    for item in data:
+        dish = str(item.get('dish', '')).strip()
+        try:
+            cals = int(round(float(item.get('estimated_cals', 0))))
+        except Exception:
+            cals = 0
+        focus = str(item.get('focus', '')).strip() or 'Balanced'
+        if not dish:
+            continue
+        # Enforce calorie bounds softly
+        if cals < min_cals:
+            cals = min_cals
+        if cals > max_cals:
+            cals = max_cals
+        cleaned.append({
+            'dish': dish,
+            'estimated_cals': cals,
+            'focus': focus,
+            'meal_type': meal_type
+        })
+    if not cleaned:
+        raise ValueError("Gemini response contained no usable dishes")
+    return tuple(cleaned[:5])
+
+def generate_gemini_fitness_suggestions(user_id: str, mongo_client, meal_type: str, cuisine_preference: str, min_cals: float, max_cals: float, food_choices_history: list) -> list:
+    """
+    Use Gemini to generate meal suggestions conditioned on cuisine, meal type, calorie band and user history.
+    Returns a list of {dish, estimated_cals, focus} dicts.
+    """
+    # Build a concise, structured prompt for JSON output
+    # Extract a short recent history snippet to ground the model
+    recent_history_text = "\n".join(
+        f"Dish: {item.get('food','')}, Rating: {item.get('rating',5)}/10, Category: {item.get('category','')}, Comments: {item.get('comments','')}"
+        for item in food_choices_history[:8]
+    ) or "None"
+
+    cuisine_text = cuisine_preference if cuisine_preference and cuisine_preference != "Any" else "Any/Generic"
+
+    # Identical inputs produce an identical prompt, so repeat requests within the TTL window reuse the earlier
+    # answer until a fitness meal rating is saved; a new rating asks Gemini again
+    ttl_window = int(time.time() // _GEMINI_CACHE_TTL)
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
-        response = model.generate_content(prompt)
-        if not response or not getattr(response, 'text', None):
-            return []
-        raw_text = response.text.strip('`').replace('json', '').strip()
-        data = ast.literal_eval(raw_text)
-        if not isinstance(data, list):
-            return []
-        cleaned = []
-        for item in data:
-            dish = str(item.get('dish', '')).strip()
-            try:
-                cals = int(round(float(item.get('estimated_cals', 0))))
-            except Exception:
-                cals = 0
-            focus = str(item.get('focus', '')).strip() or 'Balanced'
-            if not dish:
-                continue
-            # Enforce calorie bounds softly
-            if cals < int(min_cals):
-                cals = int(min_cals)
-            if cals > int(max_cals):
-                cals = int(max_cals)
-            cleaned.append({
-                'dish': dish,
-                'estimated_cals': cals,
-                'focus': focus,
-                'meal_type': meal_type
-            })
-        return cleaned[:5]
+        suggestions = _generate_gemini_suggestions_cached(
+            meal_type, cuisine_text, int(min_cals), int(max_cals), recent_history_text, ttl_window, _ratings_generation
+        )
     except Exception:
         return []
+    # Hand out copies so callers can't mutate the cached suggestions
+    return [dict(item) for item in suggestions]
+
+# Food-name keywords for the recent-choices pattern check, each compiled into a single alternation
+_HIGH_PROTEIN_KEYWORDS = ("paneer", "tofu", "chhole", "rajma", "dal", "protein")
+_COMFORT_FOOD_KEYWORDS = ("ice cream", "chocolate", "pizza", "fries", "dessert")
+_HIGH_PROTEIN_RE = re.compile("|".join(map(re.escape, _HIGH_PROTEIN_KEYWORDS)))
+_COMFORT_FOOD_RE = re.compile("|".join(map(re.escape, _COMFORT_FOOD_KEYWORDS)))
+
+# Per-user caches are emptied once they reach this many users so they can't grow without bound
+_PER_USER_CACHE_MAX = 1024
+
+# user_id -> time we last saw food history for them; history is never deleted, so a hit stays valid for a while
+_HISTORY_PROBE_TTL = 60
+_users_with_history: Dict[str, float] = {}
 
 def get_fitness_insight(user_id: str, mongo_client) -> str:
     """
@@ -95,25 +194,35 @@ def get_fitness_insight(user_id: str, mongo_client) -> str:
         A string containing the fitness insight
     """
     try:
-        db = mongo_client["food_agent_db"]
-        food_collection = db["food_choices"]
-        
-        # Get recent food choices to analyze patterns
-        recent_food = list(food_collection.find(
-            {"user_id": user_id}
-        ).sort("timestamp", -1).limit(10))
-        
-        if not recent_food:
-            return "Welcome! Your fitness agent is ready to help you make better food choices based on your activity."
-        
-        # Analyze recent food choices for fitness patterns
-        high_protein_count = sum(1 for item in recent_food 
-                               if any(keyword in item.get('food', '').lower() 
-                                     for keyword in ['paneer', 'tofu', 'chhole', 'rajma', 'dal', 'protein']))
-        
-        comfort_food_count = sum(1 for item in recent_food 
-                               if any(keyword in item.get('food', '').lower() 
-                                     for keyword in ['ice cream', 'chocolate', 'pizza', 'fries', 'dessert']))
+        food_collection = _get_collection(mongo_client, "food_choices")
+        welcome_message = "Welcome! Your fitness agent is ready to help you make better food choices based on your activity."
+        
+        # Cheap existence probe so new users skip the sorted history query entirely
+        now = time.time()
+        if now - _users_with_history.get(user_id, 0.0) > _HISTORY_PROBE_TTL:
+            if food_collection.count_documents({"user_id": user_id}, limit=1) == 0:
+                return welcome_message
+            if len(_users_with_history) >= _PER_USER_CACHE_MAX:
+                _users_with_history.clear()
+            _users_with_history[user_id] = now
+        
+        # Analyze recent food choices for fitness patterns, streaming the cursor
+        has_recent_food = False
+        high_protein_count = 0
+        comfort_food_count = 0
+        for item in food_collection.find(
+            {"user_id": user_id},
+            {"food": 1, "_id": 0}
+        ).sort("timestamp", -1).limit(10):
+            has_recent_food = True
+            food_name = item.get('food', '').lower()
+            if _HIGH_PROTEIN_RE.search(food_name):
+                high_protein_count += 1
+            if _COMFORT_FOOD_RE.search(food_name):
+                comfort_food_count += 1
+        
+        if not has_recent_food:
+            return welcome_message
         
         if high_protein_count > comfort_food_count:
             return "Great job! You've been making protein-rich choices lately. Keep up the healthy eating!"
@@ -125,7 +234,38 @@ def get_fitness_insight(user_id: str, mongo_client) -> str:
     except Exception as e:
         return f"Your fitness agent is analyzing your patterns. Check back soon for personalized insights!"
 
-def get_activity_recommendation(user_id: str, mongo_client) -> Optional[Dict[str, Any]]:
+# Time-of-day recommendations, shared read-only
+_MORNING_RECOMMENDATION = MappingProxyType({
+    "type": "Morning Energy",
+    "message": "Start your day with a protein-rich breakfast to fuel your activities!",
+    "category": "Protein is calling"
+})
+_AFTERNOON_RECOMMENDATION = MappingProxyType({
+    "type": "Midday Fuel",
+    "message": "Keep your energy up with a balanced meal that includes protein and carbs.",
+    "category": "Daily choices"
+})
+_EVENING_RECOMMENDATION = MappingProxyType({
+    "type": "Evening Recovery",
+    "message": "Time to refuel after your day's activities. Consider something comforting yet nutritious.",
+    "category": "Protein is calling"
+})
+_LATE_NIGHT_RECOMMENDATION = MappingProxyType({
+    "type": "Late Night",
+    "message": "If you're hungry, choose something light and easy to digest.",
+    "category": "Daily choices"
+})
+
+# One recommendation per hour of the day: morning 6-12, afternoon 12-17, evening 17-21, late night otherwise
+_HOURLY_RECOMMENDATIONS = tuple(
+    _MORNING_RECOMMENDATION if 6 <= hour < 12
+    else _AFTERNOON_RECOMMENDATION if 12 <= hour < 17
+    else _EVENING_RECOMMENDATION if 17 <= hour < 21
+    else _LATE_NIGHT_RECOMMENDATION
+    for hour in range(24)
+)
+
+def get_activity_recommendation(user_id: str, mongo_client) -> Mapping[str, Any]:
     """
     Get an activity-based meal recommendation.
     
@@ -134,44 +274,11 @@ def get_activity_recommendation(user_id: str, mongo_client) -> Optional[Dict[str
         mongo_client: MongoDB client connection
         
     Returns:
-        A dictionary containing the recommendation type, message, and suggested category
+        A read-only mapping containing the recommendation type, message, and suggested category
     """
-    try:
-        # For now, return a sample recommendation
-        # In the future, this would connect to Samsung S Health API
-        current_hour = datetime.now().hour
-        
-        # Morning recommendations
-        if 6 <= current_hour < 12:
-            return {
-                "type": "Morning Energy",
-                "message": "Start your day with a protein-rich breakfast to fuel your activities!",
-                "category": "Protein is calling"
-            }
-        # Afternoon recommendations
-        elif 12 <= current_hour < 17:
-            return {
-                "type": "Midday Fuel",
-                "message": "Keep your energy up with a balanced meal that includes protein and carbs.",
-                "category": "Daily choices"
-            }
-        # Evening recommendations
-        elif 17 <= current_hour < 21:
-            return {
-                "type": "Evening Recovery",
-                "message": "Time to refuel after your day's activities. Consider something comforting yet nutritious.",
-                "category": "Protein is calling"
-            }
-        # Late night recommendations
-        else:
-            return {
-                "type": "Late Night",
-                "message": "If you're hungry, choose something light and easy to digest.",
-                "category": "Daily choices"
-            }
-            
-    except Exception as e:
-        return None
+    # For now, return a sample recommendation
+    # In the future, this would connect to Samsung S Health API
+    return _HOURLY_RECOMMENDATIONS[datetime.now().hour]
 
 def analyze_activity_data(activity_type: str) -> Dict[str, Any]:
     """
@@ -212,6 +319,22 @@ def analyze_activity_data(activity_type: str) -> Dict[str, Any]:
         "nutrition_focus": "Balanced nutrition"
     })
 
+# BMI category boundaries; each bucket's lower bound is inclusive (18.5 is "Normal weight")
+_BMI_THRESHOLDS = (18.5, 25, 30)
+_BMI_CATEGORIES = ("Underweight", "Normal weight", "Overweight", "Obese")
+_BMI_HEALTH_INSIGHTS = (
+    "You may need to increase your caloric intake with nutrient-dense foods.",
+    "Great! You're in a healthy weight range. Focus on maintaining balanced nutrition.",
+    "Consider reducing caloric intake while maintaining nutrient density.",
+    "Focus on gradual weight loss through balanced nutrition and portion control."
+)
+_BMI_MEAL_FOCUS = (
+    "High-calorie, nutrient-rich meals",
+    "Balanced, varied meals",
+    "Lower-calorie, high-fiber meals",
+    "Portion-controlled, nutrient-dense meals"
+)
+
 def calculate_bmi(weight_kg: float, height_cm: float) -> Dict[str, Any]:
     """
     Calculate BMI and provide health insights.
@@ -225,31 +348,31 @@ def calculate_bmi(weight_kg: float, height_cm: float) -> Dict[str, Any]:
     """
     height_m = height_cm / 100
     bmi = weight_kg / (height_m ** 2)
-    
-    if bmi < 18.5:
-        category = "Underweight"
-        health_insight = "You may need to increase your caloric intake with nutrient-dense foods."
-        meal_focus = "High-calorie, nutrient-rich meals"
-    elif 18.5 <= bmi < 25:
-        category = "Normal weight"
-        health_insight = "Great! You're in a healthy weight range. Focus on maintaining balanced nutrition."
-        meal_focus = "Balanced, varied meals"
-    elif 25 <= bmi < 30:
-        category = "Overweight"
-        health_insight = "Consider reducing caloric intake while maintaining nutrient density."
-        meal_focus = "Lower-calorie, high-fiber meals"
-    else:
-        category = "Obese"
-        health_insight = "Focus on gradual weight loss through balanced nutrition and portion control."
-        meal_focus = "Portion-controlled, nutrient-dense meals"
+    bucket = bisect_right(_BMI_THRESHOLDS, bmi)
     
     return {
         "bmi": round(bmi, 1),
-        "category": category,
-        "health_insight": health_insight,
-        "meal_focus": meal_focus
+        "category": _BMI_CATEGORIES[bucket],
+        "health_insight": _BMI_HEALTH_INSIGHTS[bucket],
+        "meal_focus": _BMI_MEAL_FOCUS[bucket]
     }
 
+# TDEE multipliers per activity level
+_ACTIVITY_MULTIPLIERS = {
+    "sedentary": 1.2,      # Little or no exercise
+    "light": 1.375,        # Light exercise 1-3 days/week
+    "moderate": 1.55,      # Moderate exercise 3-5 days/week
+    "active": 1.725,       # Hard exercise 6-7 days/week
+    "very_active": 1.9     # Very hard exercise, physical job
+}
+
+# goal -> (daily calorie adjustment, message); anything else is treated as maintenance
+_GOAL_ADJUSTMENTS = {
+    "lose": (-500, "Weight Loss: 500 calorie deficit for healthy weight loss"),  # ~0.5kg/week loss
+    "gain": (300, "Weight Gain: 300 calorie surplus for healthy weight gain"),   # ~0.3kg/week gain
+}
+_MAINTAIN_ADJUSTMENT = (0, "Weight Maintenance: Calories balanced for current weight")
+
 def calculate_daily_calories(weight_kg: float, height_cm: float, age: int, gender: str, activity_level: str, goal: str) -> Dict[str, Any]:
     """
     Calculate daily calorie needs based on various factors.
@@ -271,28 +394,12 @@ def calculate_daily_calories(weight_kg: float, height_cm: float, age: int, gende
     else:
         bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age - 161
     
-    # Activity multipliers
-    activity_multipliers = {
-        "sedentary": 1.2,      # Little or no exercise
-        "light": 1.375,        # Light exercise 1-3 days/week
-        "moderate": 1.55,      # Moderate exercise 3-5 days/week
-        "active": 1.725,       # Hard exercise 6-7 days/week
-        "very_active": 1.9     # Very hard exercise, physical job
-    }
-    
     # Calculate Total Daily Energy Expenditure (TDEE)
-    tdee = bmr * activity_multipliers.get(activity_level.lower(), 1.55)
+    tdee = bmr * _ACTIVITY_MULTIPLIERS.get(activity_level.lower(), 1.55)
     
     # Adjust for goal
-    if goal.lower() == "lose":
-        target_calories = tdee - 500  # 500 calorie deficit for ~0.5kg/week loss
-        goal_message = "Weight Loss: 500 calorie deficit for healthy weight loss"
-    elif goal.lower() == "gain":
-        target_calories = tdee + 300  # 300 calorie surplus for ~0.3kg/week gain
-        goal_message = "Weight Gain: 300 calorie surplus for healthy weight gain"
-    else:
-        target_calories = tdee
-        goal_message = "Weight Maintenance: Calories balanced for current weight"
+    calorie_adjustment, goal_message = _GOAL_ADJUSTMENTS.get(goal.lower(), _MAINTAIN_ADJUSTMENT)
+    target_calories = tdee + calorie_adjustment
     
     # Macro breakdown (simplified)
     protein_cals = target_calories * 0.25  # 25% protein
@@ -311,6 +418,27 @@ def calculate_daily_calories(weight_kg: float, height_cm: float, age: int, gende
         }
     }
 
+def _get_dish_rating_sets(food_collection, user_id: str) -> tuple:
+    """Return (rated, disliked, favorite) lowercase dish-name sets across the user's whole history."""
+    rated_dishes = set()
+    disliked_dishes = set()
+    favorite_dishes = set()
+    # One row per distinct dish with its lowest and highest rating (unrated counts as 0)
+    for dish in food_collection.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$group": {
+            "_id": {"$toLower": {"$ifNull": ["$food", ""]}},
+            "min_rating": {"$min": {"$ifNull": ["$rating", 0]}},
+            "max_rating": {"$max": {"$ifNull": ["$rating", 0]}}
+        }}
+    ]):
+        rated_dishes.add(dish["_id"])
+        if dish["min_rating"] <= 3:
+            disliked_dishes.add(dish["_id"])
+        if dish["max_rating"] >= 7:
+            favorite_dishes.add(dish["_id"])
+    return rated_dishes, disliked_dishes, favorite_dishes
+
 def get_calorie_based_meal_suggestion(user_id: str, mongo_client, target_calories: int, meal_type: str, cuisine_preference: str) -> Dict[str, Any]:
     """
     Get calorie-based meal suggestions based on user's food history and calorie goals.
@@ -327,14 +455,18 @@ def get_calorie_based_meal_suggestion(user_id: str, mongo_client, target_calorie
         Dictionary with meal suggestions and calorie information
     """
     try:
-        db = mongo_client["food_agent_db"]
-        food_collection = db["food_choices"]
-        fitness_meals_collection = db["fitness_meals"]
+        food_collection = _get_collection(mongo_client, "food_choices")
         
-        # Get user history and learning
-        food_choices_history = list(food_collection.find({"user_id": user_id}).sort("timestamp", -1))
-        fitness_meal_history = list(fitness_meals_collection.find({"user_id": user_id}).sort("timestamp", -1).limit(50))
-        user_preferences = analyze_fitness_meal_preferences(fitness_meal_history)
+        # Only the history feeds the prompt; learn preferences and classify every dish the user
+        # ever rated on the background pool so those reads overlap the Gemini call
+        preferences_future = _BACKGROUND_POOL.submit(get_fitness_meal_preferences, user_id, mongo_client)
+        dish_sets_future = _BACKGROUND_POOL.submit(_get_dish_rating_sets, food_collection, user_id)
+        
+        # Get user history; only the recent history and the fields scoring/prompting read
+        food_choices_history = list(food_collection.find(
+            {"user_id": user_id},
+            {"food": 1, "rating": 1, "category": 1, "comments": 1, "_id": 0}
+        ).sort("timestamp", -1).limit(200))
         
         # Calorie ranges per meal type
         meal_calorie_ranges = {
@@ -344,38 +476,41 @@ def get_calorie_based_meal_suggestion(user_id: str, mongo_client, target_calorie
             "snack": (target_calories * 0.1, target_calories * 0.15)
         }
         min_cals, max_cals = meal_calorie_ranges.get(meal_type.lower(), (target_calories * 0.3, target_calories * 0.4))
+        target_range = f"{int(min_cals)}-{int(max_cals)} calories"
         
         # Ask Gemini for candidates (no hardcoded menus)
         candidates = generate_gemini_fitness_suggestions(user_id, mongo_client, meal_type, cuisine_preference, min_cals, max_cals, food_choices_history)
+        user_preferences = preferences_future.result()
         
         if not candidates:
             return {
                 "message": f"I couldn't generate {cuisine_preference} {meal_type} options right now. Try again or adjust cuisine.",
-                "target_range": f"{int(min_cals)}-{int(max_cals)} calories",
+                "target_range": target_range,
                 "suggestions": [],
                 "nutrition_tip": "Prefer whole foods, lean proteins, and complex carbs for sustained energy.",
                 "learning_insight": user_preferences.get('insight', "Your agent is learning your preferences!")
             }
         
         # Filter/score against dislikes and history
-        rated_dishes = {item.get('food', '').lower() for item in food_choices_history}
-        disliked_dishes = {item.get('food', '').lower() for item in food_choices_history if item.get('rating', 0) <= 3}
-        
-        candidate_meals = [meal for meal in candidates if meal.get('dish', '').lower() not in disliked_dishes]
-        
-        scored_meals = []
-        for meal in candidate_meals:
+        rated_dishes, disliked_dishes, favorite_dishes = dish_sets_future.result()
+        
+        # Lowercase each candidate's name once and reuse it for every history lookup below
+        dish_keys = {}
+        candidate_meals = []
+        for meal in candidates:
+            dish_key = dish_keys[meal['dish']] = meal['dish'].lower()
+            if dish_key in disliked_dishes:
+                continue
             # Ensure meal_type present for scoring
             meal['meal_type'] = meal_type
-            score = calculate_meal_preference_score(meal, user_preferences, food_choices_history)
-            scored_meals.append((meal, score))
-        scored_meals.sort(key=lambda x: x[1], reverse=True)
+            candidate_meals.append(meal)
+        scored_meals = rank_meals_by_preference(candidate_meals, user_preferences, food_choices_history)
         
         # Separate new vs past favorites
         new_suggestions = []
         past_favorites = []
         for meal, score in scored_meals:
-            if any(item.get('food', '').lower() == meal.get('dish', '').lower() and item.get('rating', 0) >= 7 for item in food_choices_history):
+            if dish_keys[meal['dish']] in favorite_dishes:
                 past_favorites.append((meal, score))
             else:
                 new_suggestions.append((meal, score))
@@ -387,8 +522,7 @@ def get_calorie_based_meal_suggestion(user_id: str, mongo_client, target_calorie
         personalized_meals = []
         for meal, score in personalized_meals_with_scores:
             personalization_message = "Personalized suggestion"
-            is_rated_before = any(item.get('food', '').lower() == meal.get('dish', '').lower() for item in food_choices_history)
-            if is_rated_before:
+            if dish_keys[meal['dish']] in rated_dishes:
                 personalization_message = "This is a past favorite (You rated it highly before!)."
             personalized_meals.append({
                 'dish': meal['dish'],
@@ -400,7 +534,7 @@ def get_calorie_based_meal_suggestion(user_id: str, mongo_client, target_calorie
         if not personalized_meals:
             return {
                 "message": "No new personalized suggestions found right now. Try different cuisine or meal type.",
-                "target_range": f"{int(min_cals)}-{int(max_cals)} calories",
+                "target_range": target_range,
                 "suggestions": [],
                 "nutrition_tip": "Prefer whole foods, lean proteins, and complex carbs for sustained energy.",
                 "learning_insight": user_preferences.get('insight', "Your agent is learning your preferences!")
@@ -408,7 +542,7 @@ def get_calorie_based_meal_suggestion(user_id: str, mongo_client, target_calorie
         
         return {
             "message": f"Here are {cuisine_preference.title() if cuisine_preference else 'Selected'} {meal_type.title()} suggestions for your {target_calories} calorie goal:",
-            "target_range": f"{int(min_cals)}-{int(max_cals)} calories",
+            "target_range": target_range,
             "suggestions": personalized_meals,
             "nutrition_tip": "Focus on whole foods, lean proteins, and complex carbohydrates for sustained energy.",
             "learning_insight": user_preferences.get('insight', "Your agent is learning your preferences!")
@@ -419,31 +553,22 @@ def get_calorie_based_meal_suggestion(user_id: str, mongo_client, target_calorie
             "suggestions": []
         }
 
-def analyze_fitness_meal_preferences(fitness_meal_history: list) -> Dict[str, Any]:
-    """
-    Analyze user's fitness meal ratings to learn preferences.
-    
-    Args:
-        fitness_meal_history: List of fitness meal ratings
-        
-    Returns:
-        Dictionary with learned preferences and insights
-    """
-    if not fitness_meal_history:
-        return {
-            "preferred_calories": "moderate",
-            "preferred_protein": "moderate",
-            "preferred_carbs": "moderate",
-            "insight": "No fitness meal history yet. Your agent will learn as you rate meals!"
-        }
+def _preferences_from_totals(meal_type_totals) -> Dict[str, Any]:
+    """Turn per-meal-type rating totals into the learned preference summary."""
+    high_cals = high_count = low_cals = low_count = 0
+    preferred_meal_types = []
+    for totals in meal_type_totals:
+        high_cals += totals["high_cals"]
+        high_count += totals["high_count"]
+        low_cals += totals["low_cals"]
+        low_count += totals["low_count"]
+        if totals["count"] >= 2 and totals["rating_sum"] / totals["count"] >= 7:
+            preferred_meal_types.append(totals["_id"])
     
     # Analyze calorie preferences
-    high_rated_meals = [meal for meal in fitness_meal_history if meal.get('rating', 0) >= 7]
-    low_rated_meals = [meal for meal in fitness_meal_history if meal.get('rating', 0) <= 4]
-    
-    if high_rated_meals:
-        avg_high_rated_cals = sum(meal.get('estimated_cals', 0) for meal in high_rated_meals) / len(high_rated_meals)
-        avg_low_rated_cals = sum(meal.get('estimated_cals', 0) for meal in low_rated_meals) / len(low_rated_meals) if low_rated_meals else 0
+    avg_high_rated_cals = high_cals / high_count if high_count else 0
+    if high_count:
+        avg_low_rated_cals = low_cals / low_count if low_count else 0
         
         if avg_high_rated_cals > avg_low_rated_cals:
             calorie_pref = "higher"
@@ -454,19 +579,6 @@ def analyze_fitness_meal_preferences(fitness_meal_history: list) -> Dict[str, An
     else:
         calorie_pref = "moderate"
     
-    # Analyze meal type preferences
-    meal_type_ratings = {}
-    for meal in fitness_meal_history:
-        meal_type = meal.get('meal_type', 'unknown')
-        if meal_type not in meal_type_ratings:
-            meal_type_ratings[meal_type] = []
-        meal_type_ratings[meal_type].append(meal.get('rating', 5))
-    
-    preferred_meal_types = []
-    for meal_type, ratings in meal_type_ratings.items():
-        if len(ratings) >= 2 and sum(ratings) / len(ratings) >= 7:
-            preferred_meal_types.append(meal_type)
-    
     # Generate insight based on preferences
     if preferred_meal_types:
         insight = f"Your agent learned you prefer {', '.join(preferred_meal_types)} with {calorie_pref} calories!"
@@ -476,10 +588,112 @@ def analyze_fitness_meal_preferences(fitness_meal_history: list) -> Dict[str, An
     return {
         "preferred_calories": calorie_pref,
         "preferred_meal_types": preferred_meal_types,
-        "avg_high_rated_cals": avg_high_rated_cals if high_rated_meals else 0,
+        "avg_high_rated_cals": avg_high_rated_cals,
         "insight": insight
     }
 
+_NO_FITNESS_HISTORY_PREFERENCES = {
+    "preferred_calories": "moderate",
+    "preferred_protein": "moderate",
+    "preferred_carbs": "moderate",
+    "insight": "No fitness meal history yet. Your agent will learn as you rate meals!"
+}
+
+def analyze_fitness_meal_preferences(fitness_meal_history: list) -> Dict[str, Any]:
+    """
+    Analyze user's fitness meal ratings to learn preferences.
+    
+    Args:
+        fitness_meal_history: List of fitness meal ratings
+        
+    Returns:
+        Dictionary with learned preferences and insights
+    """
+    if not fitness_meal_history:
+        return dict(_NO_FITNESS_HISTORY_PREFERENCES)
+    
+    # Running totals per meal type, in the order meal types first appear
+    meal_type_totals = {}
+    for meal in fitness_meal_history:
+        rating = meal['rating']
+        totals = meal_type_totals.get(meal['meal_type'])
+        if totals is None:
+            totals = meal_type_totals[meal['meal_type']] = {
+                "_id": meal['meal_type'], "rating_sum": 0, "count": 0,
+                "high_cals": 0, "high_count": 0, "low_cals": 0, "low_count": 0
+            }
+        totals["rating_sum"] += rating
+        totals["count"] += 1
+        if rating >= 7:
+            totals["high_cals"] += meal['estimated_cals']
+            totals["high_count"] += 1
+        elif rating <= 4:
+            totals["low_cals"] += meal['estimated_cals']
+            totals["low_count"] += 1
+    
+    return _preferences_from_totals(meal_type_totals.values())
+
+# user_id -> (computed_at, preferences); dropped whenever the user saves a new fitness meal rating
+_preferences_cache: Dict[str, tuple] = {}
+# Bumped on every fitness meal rating save; part of the Gemini suggestion cache key
+_ratings_generation = 0
+
+def _forget_learned_preferences(user_id: str) -> None:
+    """Drop what was learned from the user's ratings so the next suggestions reflect a new one."""
+    global _ratings_generation
+    _preferences_cache.pop(user_id, None)
+    _ratings_generation += 1
+
+def get_fitness_meal_preferences(user_id: str, mongo_client, ttl: float = 300.0) -> Dict[str, Any]:
+    """
+    Learn fitness meal preferences from the user's 50 most recent ratings, reduced on the server.
+    
+    Args:
+        user_id: The user's ID
+        mongo_client: MongoDB client connection
+        ttl: Seconds previously learned preferences may be reused
+        
+    Returns:
+        Dictionary with learned preferences and insights
+    """
+    now = time.time()
+    cached = _preferences_cache.get(user_id)
+    if cached and now - cached[0] < ttl:
+        return dict(cached[1])
+    
+    meal_type_totals = _recent_meal_type_totals(user_id, mongo_client, 50)
+    
+    if not meal_type_totals:
+        preferences = dict(_NO_FITNESS_HISTORY_PREFERENCES)
+    else:
+        preferences = _preferences_from_totals(meal_type_totals)
+    
+    if len(_preferences_cache) >= _PER_USER_CACHE_MAX:
+        _preferences_cache.clear()
+    _preferences_cache[user_id] = (now, preferences)
+    return dict(preferences)
+
+def _recent_meal_type_totals(user_id: str, mongo_client, limit: int) -> list:
+    """Reduce the user's `limit` most recent fitness meal ratings to per-meal-type totals on the server."""
+    fitness_meals_collection = _get_collection(mongo_client, "fitness_meals")
+    return list(fitness_meals_collection.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"timestamp": -1}},
+        {"$limit": limit},
+        {"$group": {
+            "_id": "$meal_type",
+            "latest": {"$first": "$timestamp"},
+            "rating_sum": {"$sum": "$rating"},
+            "count": {"$sum": 1},
+            "high_cals": {"$sum": {"$cond": [{"$gte": ["$rating", 7]}, "$estimated_cals", 0]}},
+            "high_count": {"$sum": {"$cond": [{"$gte": ["$rating", 7]}, 1, 0]}},
+            "low_cals": {"$sum": {"$cond": [{"$lte": ["$rating", 4]}, "$estimated_cals", 0]}},
+            "low_count": {"$sum": {"$cond": [{"$lte": ["$rating", 4]}, 1, 0]}}
+        }},
+        # Most recently rated meal types first, as in the list-based analysis
+        {"$sort": {"latest": -1}}
+    ]))
+
 def generate_personalized_fitness_meals(meal_type: str, min_cals: int, max_cals: int, 
                                       user_preferences: Dict[str, Any], high_rated_foods: list, cuisine_preference: str) -> list:
     """
@@ -523,7 +737,82 @@ def generate_personalized_fitness_meals(meal_type: str, min_cals: int, max_cals:
     
     return personalized_meals
 
-def get_all_fitness_meals(meal_type: str, cuisine_preference: str) -> list:
+def _freeze_meals(meals_by_key: dict) -> dict:
+    """Wrap every meal in a read-only view so the shared catalogues can't be edited through a returned entry."""
+    return {key: tuple(MappingProxyType(meal) for meal in meals) for key, meals in meals_by_key.items()}
+
+# Full fitness meal catalogue, keyed by meal type and by cuisine; shared read-only data
+_FITNESS_MEAL_CATALOGUE = _freeze_meals({
+    "breakfast": (
+        {"dish": "Oatmeal with fruits and nuts", "estimated_cals": 300, "focus": "High fiber, moderate protein"},
+        {"dish": "Greek yogurt with berries", "estimated_cals": 250, "focus": "High protein, low carb"},
+        {"dish": "Whole grain toast with avocado", "estimated_cals": 280, "focus": "Healthy fats, complex carbs"},
+        {"dish": "Protein smoothie with banana", "estimated_cals": 320, "focus": "High protein, quick energy"},
+        {"dish": "Quinoa breakfast bowl", "estimated_cals": 290, "focus": "Complete protein, fiber"},
+        {"dish": "Chia pudding with almond milk", "estimated_cals": 260, "focus": "High fiber, omega-3"},
+        {"dish": "Scrambled tofu with vegetables", "estimated_cals": 310, "focus": "High protein, vegetables"},
+        {"dish": "Buckwheat pancakes with maple syrup", "estimated_cals": 340, "focus": "Gluten-free, moderate protein"}
+    ),
+    "lunch": (
+        {"dish": "Quinoa bowl with vegetables", "estimated_cals": 400, "focus": "Complete protein, fiber"},
+        {"dish": "Lentil soup with whole grain bread", "estimated_cals": 350, "focus": "Plant protein, complex carbs"},
+        {"dish": "Chickpea salad with olive oil", "estimated_cals": 380, "focus": "Fiber, healthy fats"},
+        {"dish": "Tofu stir-fry with brown rice", "estimated_cals": 420, "focus": "High protein, balanced carbs"},
+        {"dish": "Bean and vegetable wrap", "estimated_cals": 360, "focus": "Fiber, moderate protein"},
+        {"dish": "Mushroom and spinach risotto", "estimated_cals": 390, "focus": "Creamy, moderate protein"},
+        {"dish": "Tempeh sandwich with sprouts", "estimated_cals": 370, "focus": "Fermented protein, fresh vegetables"},
+        {"dish": "Vegetable curry with millet", "estimated_cals": 410, "focus": "Spicy, high fiber"}
+    ),
+    "dinner": (
+        {"dish": "Grilled tofu with brown rice", "estimated_cals": 420, "focus": "Complete protein, whole grains"},
+        {"dish": "Vegetable curry with quinoa", "estimated_cals": 380, "focus": "Fiber, moderate protein"},
+        {"dish": "Stuffed bell peppers with lentils", "estimated_cals": 350, "focus": "Plant protein, vegetables"},
+        {"dish": "Mushroom and spinach pasta", "estimated_cals": 400, "focus": "Moderate protein, complex carbs"},
+        {"dish": "Cauliflower rice with tempeh", "estimated_cals": 340, "focus": "Low carb, high protein"},
+        {"dish": "Lentil shepherd's pie", "estimated_cals": 430, "focus": "Comfort food, high protein"},
+        {"dish": "Vegetable lasagna with cashew cheese", "estimated_cals": 450, "focus": "Italian comfort, moderate protein"},
+        {"dish": "Stir-fried vegetables with seitan", "estimated_cals": 390, "focus": "High protein, colorful vegetables"}
+    ),
+    "snack": (
+        {"dish": "Mixed nuts and dried fruits", "estimated_cals": 150, "focus": "Healthy fats, natural sugars"},
+        {"dish": "Hummus with carrot sticks", "estimated_cals": 120, "focus": "Protein, fiber"},
+        {"dish": "Apple with almond butter", "estimated_cals": 180, "focus": "Fiber, healthy fats"},
+        {"dish": "Greek yogurt with honey", "estimated_cals": 140, "focus": "High protein, natural sweetener"},
+        {"dish": "Edamame with sea salt", "estimated_cals": 130, "focus": "Complete protein, fiber"},
+        {"dish": "Dark chocolate with almonds", "estimated_cals": 160, "focus": "Antioxidants, healthy fats"},
+        {"dish": "Smoothie with protein powder", "estimated_cals": 200, "focus": "High protein, quick energy"},
+        {"dish": "Rice cakes with avocado", "estimated_cals": 170, "focus": "Light, healthy fats"}
+    ),
+    "Indian": (
+        {"dish": "Dal Khichdi with a side of yogurt", "estimated_cals": 350, "focus": "Indian, Protein, Carbs, Light meal"},
+        {"dish": "Paneer Bhurji with whole wheat roti", "estimated_cals": 420, "focus": "Indian, Protein, Low carb"},
+        {"dish": "Palak Paneer Gravy with Jowar Roti", "estimated_cals": 450, "focus": "Indian, Protein, Fiber"},
+        {"dish": "Rajma Masala with Brown Rice", "estimated_cals": 480, "focus": "Indian, Protein, Fiber, Heavy meal"},
+        {"dish": "Moong Dal Cheela with green chutney", "estimated_cals": 300, "focus": "Indian, Protein, Light meal"}
+    ),
+    "South Indian": (
+        {"dish": "Masala Dosa with Sambar", "estimated_cals": 450, "focus": "South Indian, balanced meal"},
+        {"dish": "Idli with Coconut Chutney", "estimated_cals": 250, "focus": "South Indian, light, easy to digest"},
+        {"dish": "Uttapam with Onion and Tomato", "estimated_cals": 300, "focus": "South Indian, Carbs"},
+        {"dish": "Rasam Rice with Aloo Poriyal", "estimated_cals": 400, "focus": "South Indian, Light meal"},
+        {"dish": "Lemon Rice with Sambar", "estimated_cals": 380, "focus": "South Indian, Carbs, Light meal"}
+    ),
+    "Gujarati": (
+        {"dish": "Gujarati Dal with Bajra Rotla", "estimated_cals": 400, "focus": "Gujarati, Fiber, Protein"},
+        {"dish": "Dhokla with spicy green chutney", "estimated_cals": 200, "focus": "Gujarati, light, steamed snack"},
+        {"dish": "Thepla with a side of yogurt", "estimated_cals": 320, "focus": "Gujarati, high fiber, iron"},
+        {"dish": "Handvo with mixed vegetables", "estimated_cals": 450, "focus": "Gujarati, Fermented, Protein"},
+        {"dish": "Khichu with oil and pickle", "estimated_cals": 350, "focus": "Gujarati, Light snack"}
+    ),
+    "Italian": (
+        {"dish": "Veggie and Mushroom Pasta with Tomato Sauce", "estimated_cals": 480, "focus": "Italian, Carbs, Comfort food"},
+        {"dish": "Minestrone Soup with whole grain bread", "estimated_cals": 300, "focus": "Italian, vegetables, light meal"},
+        {"dish": "Margherita Pizza on whole wheat crust", "estimated_cals": 550, "focus": "Italian, Cheat meal"},
+        {"dish": "Spinach and Ricotta Cannelloni", "estimated_cals": 520, "focus": "Italian, Protein, Comfort food"}
+    )
+})
+
+def get_all_fitness_meals(meal_type: str, cuisine_preference: str) -> tuple:
     """
     Get all available fitness meal suggestions for a meal type and cuisine.
     
@@ -532,89 +821,66 @@ def get_all_fitness_meals(meal_type: str, cuisine_preference: str) -> list:
         cuisine_preference: User's preferred cuisine
         
     Returns:
-        List of all available meal suggestions
+        Tuple of all available meal suggestions as read-only mappings
     """
-    # This dictionary now contains a comprehensive list of meals, categorized by type and cuisine.
-    meal_suggestions = {
-        "breakfast": [
-            {"dish": "Oatmeal with fruits and nuts", "estimated_cals": 300, "focus": "High fiber, moderate protein"},
-            {"dish": "Greek yogurt with berries", "estimated_cals": 250, "focus": "High protein, low carb"},
-            {"dish": "Whole grain toast with avocado", "estimated_cals": 280, "focus": "Healthy fats, complex carbs"},
-            {"dish": "Protein smoothie with banana", "estimated_cals": 320, "focus": "High protein, quick energy"},
-            {"dish": "Quinoa breakfast bowl", "estimated_cals": 290, "focus": "Complete protein, fiber"},
-            {"dish": "Chia pudding with almond milk", "estimated_cals": 260, "focus": "High fiber, omega-3"},
-            {"dish": "Scrambled tofu with vegetables", "estimated_cals": 310, "focus": "High protein, vegetables"},
-            {"dish": "Buckwheat pancakes with maple syrup", "estimated_cals": 340, "focus": "Gluten-free, moderate protein"}
-        ],
-        "lunch": [
-            {"dish": "Quinoa bowl with vegetables", "estimated_cals": 400, "focus": "Complete protein, fiber"},
-            {"dish": "Lentil soup with whole grain bread", "estimated_cals": 350, "focus": "Plant protein, complex carbs"},
-            {"dish": "Chickpea salad with olive oil", "estimated_cals": 380, "focus": "Fiber, healthy fats"},
-            {"dish": "Tofu stir-fry with brown rice", "estimated_cals": 420, "focus": "High protein, balanced carbs"},
-            {"dish": "Bean and vegetable wrap", "estimated_cals": 360, "focus": "Fiber, moderate protein"},
-            {"dish": "Mushroom and spinach risotto", "estimated_cals": 390, "focus": "Creamy, moderate protein"},
-            {"dish": "Tempeh sandwich with sprouts", "estimated_cals": 370, "focus": "Fermented protein, fresh vegetables"},
-            {"dish": "Vegetable curry with millet", "estimated_cals": 410, "focus": "Spicy, high fiber"}
-        ],
-        "dinner": [
-            {"dish": "Grilled tofu with brown rice", "estimated_cals": 420, "focus": "Complete protein, whole grains"},
-            {"dish": "Vegetable curry with quinoa", "estimated_cals": 380, "focus": "Fiber, moderate protein"},
-            {"dish": "Stuffed bell peppers with lentils", "estimated_cals": 350, "focus": "Plant protein, vegetables"},
-            {"dish": "Mushroom and spinach pasta", "estimated_cals": 400, "focus": "Moderate protein, complex carbs"},
-            {"dish": "Cauliflower rice with tempeh", "estimated_cals": 340, "focus": "Low carb, high protein"},
-            {"dish": "Lentil shepherd's pie", "estimated_cals": 430, "focus": "Comfort food, high protein"},
-            {"dish": "Vegetable lasagna with cashew cheese", "estimated_cals": 450, "focus": "Italian comfort, moderate protein"},
-            {"dish": "Stir-fried vegetables with seitan", "estimated_cals": 390, "focus": "High protein, colorful vegetables"}
-        ],
-        "snack": [
-            {"dish": "Mixed nuts and dried fruits", "estimated_cals": 150, "focus": "Healthy fats, natural sugars"},
-            {"dish": "Hummus with carrot sticks", "estimated_cals": 120, "focus": "Protein, fiber"},
-            {"dish": "Apple with almond butter", "estimated_cals": 180, "focus": "Fiber, healthy fats"},
-            {"dish": "Greek yogurt with honey", "estimated_cals": 140, "focus": "High protein, natural sweetener"},
-            {"dish": "Edamame with sea salt", "estimated_cals": 130, "focus": "Complete protein, fiber"},
-            {"dish": "Dark chocolate with almonds", "estimated_cals": 160, "focus": "Antioxidants, healthy fats"},
-            {"dish": "Smoothie with protein powder", "estimated_cals": 200, "focus": "High protein, quick energy"},
-            {"dish": "Rice cakes with avocado", "estimated_cals": 170, "focus": "Light, healthy fats"}
-        ],
-        "Indian": [
-            {"dish": "Dal Khichdi with a side of yogurt", "estimated_cals": 350, "focus": "Indian, Protein, Carbs, Light meal"},
-            {"dish": "Paneer Bhurji with whole wheat roti", "estimated_cals": 420, "focus": "Indian, Protein, Low carb"},
-            {"dish": "Palak Paneer Gravy with Jowar Roti", "estimated_cals": 450, "focus": "Indian, Protein, Fiber"},
-            {"dish": "Rajma Masala with Brown Rice", "estimated_cals": 480, "focus": "Indian, Protein, Fiber, Heavy meal"},
-            {"dish": "Moong Dal Cheela with green chutney", "estimated_cals": 300, "focus": "Indian, Protein, Light meal"}
-        ],
-        "South Indian": [
-            {"dish": "Masala Dosa with Sambar", "estimated_cals": 450, "focus": "South Indian, balanced meal"},
-            {"dish": "Idli with Coconut Chutney", "estimated_cals": 250, "focus": "South Indian, light, easy to digest"},
-            {"dish": "Uttapam with Onion and Tomato", "estimated_cals": 300, "focus": "South Indian, Carbs"},
-            {"dish": "Rasam Rice with Aloo Poriyal", "estimated_cals": 400, "focus": "South Indian, Light meal"},
-            {"dish": "Lemon Rice with Sambar", "estimated_cals": 380, "focus": "South Indian, Carbs, Light meal"}
-        ],
-        "Gujarati": [
-            {"dish": "Gujarati Dal with Bajra Rotla", "estimated_cals": 400, "focus": "Gujarati, Fiber, Protein"},
-            {"dish": "Dhokla with spicy green chutney", "estimated_cals": 200, "focus": "Gujarati, light, steamed snack"},
-            {"dish": "Thepla with a side of yogurt", "estimated_cals": 320, "focus": "Gujarati, high fiber, iron"},
-            {"dish": "Handvo with mixed vegetables", "estimated_cals": 450, "focus": "Gujarati, Fermented, Protein"},
-            {"dish": "Khichu with oil and pickle", "estimated_cals": 350, "focus": "Gujarati, Light snack"}
-        ],
-        "Italian": [
-            {"dish": "Veggie and Mushroom Pasta with Tomato Sauce", "estimated_cals": 480, "focus": "Italian, Carbs, Comfort food"},
-            {"dish": "Minestrone Soup with whole grain bread", "estimated_cals": 300, "focus": "Italian, vegetables, light meal"},
-            {"dish": "Margherita Pizza on whole wheat crust", "estimated_cals": 550, "focus": "Italian, Cheat meal"},
-            {"dish": "Spinach and Ricotta Cannelloni", "estimated_cals": 520, "focus": "Italian, Protein, Comfort food"}
-        ]
-    }
-    
-    all_meals = []
+    return _FITNESS_MEAL_CATALOGUE.get(_fitness_catalogue_key(meal_type, cuisine_preference), ())
+
+def _fitness_catalogue_key(meal_type: str, cuisine_preference: str) -> Optional[str]:
+    """Pick the catalogue entry: the chosen cuisine if we have one, else the generic meal type."""
     # If a specific cuisine is chosen, use only those meals
     if cuisine_preference and cuisine_preference != "Any":
-        all_meals.extend(meal_suggestions.get(cuisine_preference.title(), []))
+        cuisine_key = cuisine_preference.title()
+        if cuisine_key in _FITNESS_MEAL_CATALOGUE:
+            return cuisine_key
     
     # If no specific cuisine is selected, fall back to the generic meal type
-    if not all_meals and meal_type:
-        all_meals.extend(meal_suggestions.get(meal_type.lower(), []))
-    
-    return all_meals
+    return meal_type.lower() if meal_type else None
+
+# Fallback meal suggestions used when no personalized list can be built
+_DEFAULT_MEAL_SUGGESTIONS = _freeze_meals({
+    "breakfast": [
+        {"dish": "Oatmeal with fruits and nuts", "estimated_cals": 300, "focus": "High fiber, moderate protein"},
+        {"dish": "Greek yogurt with berries", "estimated_cals": 250, "focus": "High protein, low carb"},
+        {"dish": "Whole grain toast with avocado", "estimated_cals": 280, "focus": "Healthy fats, complex carbs"},
+        {"dish": "Protein smoothie with banana", "estimated_cals": 320, "focus": "High protein, quick energy"},
+        {"dish": "Quinoa breakfast bowl", "estimated_cals": 290, "focus": "Complete protein, fiber"}
+    ],
+    "lunch": [
+        {"dish": "Quinoa bowl with vegetables", "estimated_cals": 400, "focus": "Complete protein, fiber"},
+        {"dish": "Lentil soup with whole grain bread", "estimated_cals": 350, "focus": "Plant protein, complex carbs"},
+        {"dish": "Chickpea salad with olive oil", "estimated_cals": 380, "focus": "Fiber, healthy fats"},
+        {"dish": "Tofu stir-fry with brown rice", "estimated_cals": 420, "focus": "High protein, balanced carbs"},
+        {"dish": "Bean and vegetable wrap", "estimated_cals": 360, "focus": "Fiber, moderate protein"}
+    ],
+    "dinner": [
+        {"dish": "Grilled tofu with brown rice", "estimated_cals": 420, "focus": "Complete protein, whole grains"},
+        {"dish": "Vegetable curry with quinoa", "estimated_cals": 380, "focus": "Fiber, moderate protein"},
+        {"dish": "Stuffed bell peppers with lentils", "estimated_cals": 350, "focus": "Plant protein, vegetables"},
+        {"dish": "Mushroom and spinach pasta", "estimated_cals": 400, "focus": "Moderate protein, complex carbs"},
+        {"dish": "Cauliflower rice with tempeh", "estimated_cals": 340, "focus": "Low carb, high protein"}
+    ],
+    "snack": [
+        {"dish": "Mixed nuts and dried fruits", "estimated_cals": 150, "focus": "Healthy fats, natural sugars"},
+        {"dish": "Hummus with carrot sticks", "estimated_cals": 120, "focus": "Protein, fiber"},
+        {"dish": "Apple with almond butter", "estimated_cals": 180, "focus": "Fiber, healthy fats"},
+        {"dish": "Greek yogurt with honey", "estimated_cals": 140, "focus": "High protein, natural sweetener"},
+        {"dish": "Edamame with sea salt", "estimated_cals": 130, "focus": "Complete protein, fiber"}
+    ]
+})
+
+def _index_by_calories(meals: tuple) -> tuple:
+    """Return (sorted calories, meals sorted by calories) so a calorie window is a bisect slice."""
+    by_cals = tuple(sorted(meals, key=itemgetter("estimated_cals")))
+    return tuple(meal["estimated_cals"] for meal in by_cals), by_cals
+
+_SORTED_DEFAULT_MEALS = {meal_type: _index_by_calories(meals) for meal_type, meals in _DEFAULT_MEAL_SUGGESTIONS.items()}
+
+def _index_positions_by_calories(meals: tuple) -> tuple:
+    """Return (sorted calories, catalogue positions in that order) so a calorie window is a bisect slice."""
+    order = sorted(range(len(meals)), key=lambda position: meals[position]["estimated_cals"])
+    return tuple(meals[position]["estimated_cals"] for position in order), tuple(order)
+
+_FITNESS_MEAL_CALORIE_INDEX = {key: _index_positions_by_calories(meals) for key, meals in _FITNESS_MEAL_CATALOGUE.items()}
 
 def get_default_fitness_meals(meal_type: str, min_cals: int, max_cals: int) -> list:
     """
@@ -629,49 +895,23 @@ def get_default_fitness_meals(meal_type: str, min_cals: int, max_cals: int) -> l
         List of default meal suggestions
     """
     # Fallback to a broader range if specific cuisine/preference lists are empty
-    meal_suggestions = {
-        "breakfast": [
-            {"dish": "Oatmeal with fruits and nuts", "estimated_cals": 300, "focus": "High fiber, moderate protein"},
-            {"dish": "Greek yogurt with berries", "estimated_cals": 250, "focus": "High protein, low carb"},
-            {"dish": "Whole grain toast with avocado", "estimated_cals": 280, "focus": "Healthy fats, complex carbs"},
-            {"dish": "Protein smoothie with banana", "estimated_cals": 320, "focus": "High protein, quick energy"},
-            {"dish": "Quinoa breakfast bowl", "estimated_cals": 290, "focus": "Complete protein, fiber"}
-        ],
-        "lunch": [
-            {"dish": "Quinoa bowl with vegetables", "estimated_cals": 400, "focus": "Complete protein, fiber"},
-            {"dish": "Lentil soup with whole grain bread", "estimated_cals": 350, "focus": "Plant protein, complex carbs"},
-            {"dish": "Chickpea salad with olive oil", "estimated_cals": 380, "focus": "Fiber, healthy fats"},
-            {"dish": "Tofu stir-fry with brown rice", "estimated_cals": 420, "focus": "High protein, balanced carbs"},
-            {"dish": "Bean and vegetable wrap", "estimated_cals": 360, "focus": "Fiber, moderate protein"}
-        ],
-        "dinner": [
-            {"dish": "Grilled tofu with brown rice", "estimated_cals": 420, "focus": "Complete protein, whole grains"},
-            {"dish": "Vegetable curry with quinoa", "estimated_cals": 380, "focus": "Fiber, moderate protein"},
-            {"dish": "Stuffed bell peppers with lentils", "estimated_cals": 350, "focus": "Plant protein, vegetables"},
-            {"dish": "Mushroom and spinach pasta", "estimated_cals": 400, "focus": "Moderate protein, complex carbs"},
-            {"dish": "Cauliflower rice with tempeh", "estimated_cals": 340, "focus": "Low carb, high protein"}
-        ],
-        "snack": [
-            {"dish": "Mixed nuts and dried fruits", "estimated_cals": 150, "focus": "Healthy fats, natural sugars"},
-            {"dish": "Hummus with carrot sticks", "estimated_cals": 120, "focus": "Protein, fiber"},
-            {"dish": "Apple with almond butter", "estimated_cals": 180, "focus": "Fiber, healthy fats"},
-            {"dish": "Greek yogurt with honey", "estimated_cals": 140, "focus": "High protein, natural sweetener"},
-            {"dish": "Edamame with sea salt", "estimated_cals": 130, "focus": "Complete protein, fiber"}
-        ]
-    }
-    
-    suggestions = meal_suggestions.get(meal_type.lower(), meal_suggestions["lunch"])
+    meal_type = meal_type.lower()
+    if meal_type not in _DEFAULT_MEAL_SUGGESTIONS:
+        meal_type = "lunch"
+    sorted_cals, sorted_meals = _SORTED_DEFAULT_MEALS[meal_type]
     
     # Filter suggestions based on calorie range
-    filtered_suggestions = [
-        s for s in suggestions 
-        if min_cals <= s["estimated_cals"] <= max_cals
-    ]
+    filtered_suggestions = sorted_meals[bisect_left(sorted_cals, min_cals):bisect_right(sorted_cals, max_cals)]
     
     if not filtered_suggestions:
-        filtered_suggestions = suggestions[:2]  # Fallback to first 2 suggestions
+        filtered_suggestions = _DEFAULT_MEAL_SUGGESTIONS[meal_type][:2]  # Fallback to first 2 suggestions
     
-    return filtered_suggestions
+    # Hand out copies so callers can modify the suggestions freely
+    return [dict(meal) for meal in filtered_suggestions]
+
+def _canonical_meal_type(meal_type) -> str:
+    """Normalize a meal type so ratings group under a single key (e.g. "Lunch " -> "lunch")."""
+    return str(meal_type or "unknown").strip().lower()
 
 def save_fitness_meal_rating(user_id: str, mongo_client, meal_data: Dict[str, Any]) -> bool:
     """
@@ -685,22 +925,49 @@ def save_fitness_meal_rating(user_id: str, mongo_client, meal_data: Dict[str, An
     Returns:
         True if successful, False otherwise
     """
-    try:
-        db = mongo_client["food_agent_db"]
-        fitness_meals_collection = db["fitness_meals"]
-        
-        # Add metadata
-        meal_data["user_id"] = user_id
-        meal_data["timestamp"] = time.time()
-        meal_data["rating_date"] = datetime.now()
-        
-        # Insert the rating
-        fitness_meals_collection.insert_one(meal_data)
+    return save_fitness_meal_ratings_bulk(user_id, mongo_client, [meal_data]) == 1
+
+def save_fitness_meal_ratings_bulk(user_id: str, mongo_client, meal_data_list: list) -> int:
+    """
+    Save several fitness meal ratings in a single round trip.
+    
+    Args:
+        user_id: The user's ID
+        mongo_client: MongoDB client connection
+        meal_data_list: List of dictionaries containing meal rating data
         
-        return True
-    except Exception as e:
-        print(f"Error saving fitness meal rating: {e}")
-        return False
+    Returns:
+        Number of ratings saved
+    """
+    if not meal_data_list:
+        return 0
+    
+    try:
+        fitness_meals_collection = _get_collection(mongo_client, "fitness_meals")
+        
+        # Add metadata; a native BSON date lets the (user_id, timestamp) index serve the sort
+        now = datetime.now(timezone.utc)
+        operations = []
+        for meal_data in meal_data_list:
+            meal_data["user_id"] = user_id
+            meal_data["timestamp"] = now
+            meal_data.setdefault("rating", 5)
+            meal_data.setdefault("estimated_cals", 0)
+            meal_data["meal_type"] = _canonical_meal_type(meal_data.get("meal_type"))
+            operations.append(InsertOne(meal_data))
+        
+        # Unordered so the server can apply the inserts without serializing on each one
+        result = fitness_meals_collection.bulk_write(operations, ordered=False)
+        _forget_learned_preferences(user_id)
+        return result.inserted_count
+    except BulkWriteError as e:
+        # Unordered inserts keep going past a failed one, so some ratings may still have landed
+        logger.exception("Error saving some fitness meal ratings")
+        _forget_learned_preferences(user_id)
+        return e.details.get("nInserted", 0)
+    except PyMongoError:
+        logger.exception("Error saving fitness meal ratings")
+        return 0
 
 def get_fitness_meal_insights(user_id: str, mongo_client) -> Dict[str, Any]:
     """
@@ -714,15 +981,10 @@ def get_fitness_meal_insights(user_id: str, mongo_client) -> Dict[str, Any]:
         Dictionary with insights and recommendations
     """
     try:
-        db = mongo_client["food_agent_db"]
-        fitness_meals_collection = db["fitness_meals"]
-        
-        # Get recent fitness meal ratings
-        recent_ratings = list(fitness_meals_collection.find({
-            "user_id": user_id
-        }).sort("timestamp", -1).limit(20))
+        # Per-meal-type totals over the 20 most recent fitness meal ratings
+        meal_type_totals = _recent_meal_type_totals(user_id, mongo_client, 20)
         
-        if not recent_ratings:
+        if not meal_type_totals:
             return {
                 "total_meals_rated": 0,
                 "avg_rating": 0,
@@ -732,27 +994,21 @@ def get_fitness_meal_insights(user_id: str, mongo_client) -> Dict[str, Any]:
                 "recommendations": ["Try different meal types to discover your preferences"]
             }
         
-        # Calculate statistics
-        total_meals = len(recent_ratings)
-        avg_rating = sum(meal.get('rating', 5) for meal in recent_ratings) / total_meals
-        
-        # Analyze meal type preferences
-        meal_type_ratings = {}
-        for meal in recent_ratings:
-            meal_type = meal.get('meal_type', 'unknown')
-            if meal_type not in meal_type_ratings:
-                meal_type_ratings[meal_type] = []
-            meal_type_ratings[meal_type].append(meal.get('rating', 5))
-        
+        # Calculate statistics and meal type preferences in one pass over the per-type rows
+        total_meals = rating_sum = high_count = high_cals = 0
         preferred_meal_types = []
-        for meal_type, ratings in meal_type_ratings.items():
-            if len(ratings) >= 2 and sum(ratings) / len(ratings) >= 7:
-                preferred_meal_types.append(meal_type)
+        for totals in meal_type_totals:
+            total_meals += totals["count"]
+            rating_sum += totals["rating_sum"]
+            high_count += totals["high_count"]
+            high_cals += totals["high_cals"]
+            if totals["count"] >= 2 and totals["rating_sum"] / totals["count"] >= 7:
+                preferred_meal_types.append(totals["_id"])
+        avg_rating = rating_sum / total_meals
         
         # Analyze calorie preferences
-        high_rated_meals = [meal for meal in recent_ratings if meal.get('rating', 0) >= 7]
-        if high_rated_meals:
-            avg_high_cals = sum(meal.get('estimated_cals', 0) for meal in high_rated_meals) / len(high_rated_meals)
+        if high_count:
+            avg_high_cals = high_cals / high_count
             if avg_high_cals > 400:
                 calorie_pref = "higher"
             elif avg_high_cals < 300:
@@ -818,46 +1074,82 @@ def save_fitness_goals(user_id: str, mongo_client, goals_data: Dict[str, Any]) -
     Returns:
         True if successful, False otherwise
     """
-    try:
-        db = mongo_client["food_agent_db"]
-        fitness_goals_collection = db["fitness_goals"]
+    return save_fitness_goals_bulk(mongo_client, [(user_id, goals_data)])
+
+def save_fitness_goals_bulk(mongo_client, goals_updates: list) -> bool:
+    """
+    Save fitness goals for several users in a single round trip.
+    
+    Args:
+        mongo_client: MongoDB client connection
+        goals_updates: List of (user_id, goals_data) pairs
         
-        # Add timestamp and user_id
-        goals_data["user_id"] = user_id
-        goals_data["timestamp"] = time.time()
-        goals_data["last_updated"] = datetime.now()
+    Returns:
+        True if successful, False otherwise
+    """
+    if not goals_updates:
+        return True
+    
+    try:
+        fitness_goals_collection = _get_collection(mongo_client, "fitness_goals")
+        
+        # Let the server stamp last_updated; user_id comes from the filter on upsert, and created_at
+        # stays out of $set because MongoDB rejects a path set by both $set and $setOnInsert
+        created_at = datetime.now(timezone.utc)
+        operations = [
+            UpdateOne(
+                {"user_id": user_id},
+                {
+                    "$set": {k: v for k, v in goals_data.items() if k not in ("user_id", "last_updated", "created_at")},
+                    "$currentDate": {"last_updated": True},
+                    "$setOnInsert": {"created_at": created_at},
+                },
+                upsert=True
+            )
+            for user_id, goals_data in goals_updates
+        ]
         
         # Update existing goals or insert new ones
-        fitness_goals_collection.update_one(
-            {"user_id": user_id},
-            {"$set": goals_data},
-            upsert=True
-        )
+        fitness_goals_collection.bulk_write(operations, ordered=False)
+        for user_id, _ in goals_updates:
+            _goals_cache.pop(user_id, None)
         
         return True
-    except Exception as e:
-        print(f"Error saving fitness goals: {e}")
+    except PyMongoError:
+        logger.exception("Error saving fitness goals")
         return False
 
-def get_fitness_goals(user_id: str, mongo_client) -> Optional[Dict[str, Any]]:
+# user_id -> (fetched_at, goals); lets repeated dashboard reruns skip Mongo for a few seconds
+_goals_cache: Dict[str, tuple] = {}
+
+def get_fitness_goals(user_id: str, mongo_client, ttl: float = 5.0) -> Optional[Dict[str, Any]]:
     """
     Retrieve user's fitness goals from the database.
     
     Args:
         user_id: The user's ID
         mongo_client: MongoDB client connection
+        ttl: Seconds a previously fetched result may be reused
         
     Returns:
         Dictionary with fitness goals or None if not found
     """
+    now = time.time()
+    cached = _goals_cache.get(user_id)
+    if cached and now - cached[0] < ttl:
+        goals = cached[1]
+        return dict(goals) if goals else goals
+    
     try:
-        db = mongo_client["food_agent_db"]
-        fitness_goals_collection = db["fitness_goals"]
-        
-        goals = fitness_goals_collection.find_one({"user_id": user_id})
-        return goals
-    except Exception as e:
-        print(f"Error retrieving fitness goals: {e}")
+        fitness_goals_collection = _get_collection(mongo_client, "fitness_goals")
+        
+        goals = fitness_goals_collection.find_one({"user_id": user_id}, projection={"_id": 0})
+        if len(_goals_cache) >= _PER_USER_CACHE_MAX:
+            _goals_cache.clear()
+        _goals_cache[user_id] = (now, goals)
+        return dict(goals) if goals else goals
+    except PyMongoError:
+        logger.exception("Error retrieving fitness goals")
         return None
 
 def get_workout_recovery_meal(user_id: str, mongo_client) -> str:
@@ -872,23 +1164,23 @@ def get_workout_recovery_meal(user_id: str, mongo_client) -> str:
         A string with the recovery meal recommendation
     """
     try:
-        db = mongo_client["food_agent_db"]
-        food_collection = db["food_choices"]
+        food_collection = _get_collection(mongo_client, "food_choices")
         
-        # Look for high-protein foods the user has rated highly
-        high_rated_protein = list(food_collection.find({
+        # Look for the best-rated high-protein food, most recent first among ties;
+        # the (user_id, rating, category) index serves the filter and the rating order
+        top_choice = food_collection.find_one({
             "user_id": user_id,
             "rating": {"$gte": 7},
             "category": "Protein is calling"
-        }).sort("timestamp", -1).limit(3))
+        }, {"food": 1, "rating": 1, "_id": 0}, sort=[("rating", -1), ("timestamp", -1)])
         
-        if high_rated_protein:
-            top_choice = high_rated_protein[0]
-            return f"Perfect post-workout choice: {top_choice['food']} (You rated it {top_choice['rating']}/10!)"
+        if top_choice:
+            return f"Perfect post-workout choice: {top_choice.get('food', 'a protein-rich meal')} (You rated it {top_choice.get('rating')}/10!)"
         else:
             return "Consider a protein-rich meal from the 'Protein is calling' category for optimal recovery!"
             
-    except Exception as e:
+    except Exception:
+        logger.exception("Error fetching workout recovery meal")
         return "Focus on protein-rich foods for workout recovery!"
 
 def get_daily_activity_summary(user_id: str, mongo_client) -> Dict[str, Any]:
@@ -903,23 +1195,28 @@ def get_daily_activity_summary(user_id: str, mongo_client) -> Dict[str, Any]:
         A dictionary with daily summary information
     """
     try:
-        db = mongo_client["food_agent_db"]
-        food_collection = db["food_choices"]
+        food_collection = _get_collection(mongo_client, "food_choices")
         
+        # [local midnight, next local midnight) as epoch seconds, matching how food choices are stamped
         today = datetime.now().date()
-        today_start = datetime.combine(today, datetime.min.time())
-        today_end = datetime.combine(today, datetime.max.time())
-        
-        # Get today's food choices
-        today_food = list(food_collection.find({
-            "user_id": user_id,
-            "timestamp": {
-                "$gte": time.mktime(today_start.timetuple()),
-                "$lte": time.mktime(today_end.timetuple())
-            }
-        }))
-        
-        if not today_food:
+        today_start = datetime.combine(today, datetime.min.time()).timestamp()
+        tomorrow_start = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
+        
+        # Count, average and de-duplicate today's food choices on the server
+        summary = next(food_collection.aggregate([
+            {"$match": {
+                "user_id": user_id,
+                "timestamp": {"$gte": today_start, "$lt": tomorrow_start}
+            }},
+            {"$group": {
+                "_id": None,
+                "meals_today": {"$sum": 1},
+                "avg_rating": {"$avg": {"$ifNull": ["$rating", 5]}},
+                "categories": {"$addToSet": {"$ifNull": ["$category", "Unknown"]}}
+            }}
+        ]), None)
+        
+        if not summary:
             return {
                 "meals_today": 0,
                 "avg_rating": 0,
@@ -927,17 +1224,20 @@ def get_daily_activity_summary(user_id: str, mongo_client) -> Dict[str, Any]:
                 "message": "No meals logged today. Ready to start tracking?"
             }
         
-        avg_rating = sum(item.get('rating', 5) for item in today_food) / len(today_food)
-        categories = list(set(item.get('category', 'Unknown') for item in today_food))
+        meals_today = summary.get("meals_today", 0)
+        # $avg ignores non-numeric ratings and yields null when none are left
+        avg_rating = summary.get("avg_rating")
+        avg_rating = round(avg_rating, 1) if avg_rating is not None else 0
         
         return {
-            "meals_today": len(today_food),
-            "avg_rating": round(avg_rating, 1),
-            "categories": categories,
-            "message": f"Today's summary: {len(today_food)} meals with average rating of {round(avg_rating, 1)}/10"
+            "meals_today": meals_today,
+            "avg_rating": avg_rating,
+            "categories": summary.get("categories", []),
+            "message": f"Today's summary: {meals_today} meals with average rating of {avg_rating}/10"
         }
         
-    except Exception as e:
+    except Exception:
+        logger.exception("Error fetching daily activity summary")
         return {
             "meals_today": 0,
             "avg_rating": 0,
@@ -945,29 +1245,30 @@ def get_daily_activity_summary(user_id: str, mongo_client) -> Dict[str, Any]:
             "message": "Unable to fetch today's summary. Check back later!"
         }
 
-def calculate_meal_preference_score(meal: Dict[str, Any], user_preferences: Dict[str, Any], food_choices_history: list) -> float:
+def calculate_meal_preference_score(meal: Dict[str, Any], user_preferences: Dict[str, Any], disliked_dishes: set, liked_dishes: set, regional_flags: Dict[str, bool]) -> float:
     """
     Calculate a preference score for a meal based on user preferences and history.
     
     Args:
         meal: Meal dictionary
         user_preferences: User's learned preferences
-        food_choices_history: User's general food rating history
+        disliked_dishes: Lowercased dishes the user rated 3 or below
+        liked_dishes: Lowercased dishes the user rated above 3
+        regional_flags: Whether the user has a highly rated "south indian" / "gujarati" dish
         
     Returns:
         Preference score (higher is better)
     """
     score = 0.0
+    dish = meal.get('dish', '').lower()
     
     # Penalize meals that have been rated before to avoid repetition
-    for item in food_choices_history:
-        if item.get('food', '').lower() == meal.get('dish', '').lower():
-            # Apply a heavy penalty if the food was disliked
-            if item.get('rating', 5) <= 3:
-                score -= 10.0
-            # Apply a moderate penalty to foods that were liked to encourage trying new ones
-            else:
-                score -= 3.0
+    # Apply a heavy penalty if the food was disliked
+    if dish in disliked_dishes:
+        score -= 10.0
+    # Apply a moderate penalty to foods that were liked to encourage trying new ones
+    elif dish in liked_dishes:
+        score -= 3.0
     
     # Base score from calorie preference
     if user_preferences.get('preferred_calories') == 'higher':
@@ -995,18 +1296,52 @@ def calculate_meal_preference_score(meal: Dict[str, Any], user_preferences: Dict
     elif 'fiber' in focus and user_preferences.get('preferred_fiber') == 'high':
         score += 1.5
     
-    # Score based on regional similarity
-    if "south indian" in focus or "south indian" in meal.get('dish', '').lower():
-        # Check if the user's food history contains a high-rated South Indian dish
-        if any("south indian" in item.get('food', '').lower() and item.get('rating', 0) >= 7 for item in food_choices_history):
-            score += 5.0
-    if "gujarati" in focus or "gujarati" in meal.get('dish', '').lower():
-        # Check if the user's food history contains a high-rated Gujarati dish
-        if any("gujarati" in item.get('food', '').lower() and item.get('rating', 0) >= 7 for item in food_choices_history):
-            score += 5.0
+    # Score based on regional similarity to a high-rated dish in the user's history
+    if regional_flags['south indian'] and ("south indian" in focus or "south indian" in dish):
+        score += 5.0
+    if regional_flags['gujarati'] and ("gujarati" in focus or "gujarati" in dish):
+        score += 5.0
 
     return score
 
+def rank_meals_by_preference(meals: list, user_preferences: Dict[str, Any], food_choices_history: list) -> list:
+    """
+    Score a batch of candidate meals and order them best first.
+    
+    Args:
+        meals: Candidate meal dictionaries
+        user_preferences: User's learned preferences
+        food_choices_history: User's general food rating history
+        
+    Returns:
+        List of (meal, score) tuples sorted by descending score
+    """
+    # Build the history lookups in one pass per batch instead of rescanning history for every meal
+    disliked_dishes = set()
+    liked_dishes = set()
+    regional_flags = {"south indian": False, "gujarati": False}
+    for item in food_choices_history:
+        food = item.get('food', '').lower()
+        rating = item.get('rating')
+        if rating is None:
+            liked_dishes.add(food)
+            continue
+        if rating <= 3:
+            disliked_dishes.add(food)
+        else:
+            liked_dishes.add(food)
+            if rating >= 7:
+                for region in regional_flags:
+                    if region in food:
+                        regional_flags[region] = True
+    
+    scored_meals = [
+        (meal, calculate_meal_preference_score(meal, user_preferences, disliked_dishes, liked_dishes, regional_flags))
+        for meal in meals
+    ]
+    scored_meals.sort(key=itemgetter(1), reverse=True)
+    return scored_meals
+
 def get_personalized_meal_rotation(user_id: str, mongo_client, meal_type: str, target_calories: int, cuisine_preference: str, food_choices_history: list) -> list:
     """
     Get personalized meal suggestions with rotation to avoid repetition.
@@ -1022,29 +1357,46 @@ def get_personalized_meal_rotation(user_id: str, mongo_client, meal_type: str, t
     Returns:
         List of personalized meal suggestions
     """
+    # Calorie range for this meal; computed up front so the fallback below can always use it
+    min_cals = target_calories * 0.25
+    max_cals = target_calories * 0.4
+    
     try:
-        # Get user preferences
-        fitness_meal_history = list(mongo_client["food_agent_db"]["fitness_meals"].find({"user_id": user_id}).sort("timestamp", -1).limit(50))
-        user_preferences = analyze_fitness_meal_preferences(fitness_meal_history)
+        # Learn preferences in the background while the meal catalogue is loaded
+        preferences_future = _BACKGROUND_POOL.submit(get_fitness_meal_preferences, user_id, mongo_client)
         
-        # Get all available meals
-        all_meals = get_all_fitness_meals(meal_type, cuisine_preference)
+        # Group the history's ratings by dish once; every later history check is a lookup here
+        history_ratings = {}
+        for item in food_choices_history:
+            history_ratings.setdefault(item.get('food', '').lower(), []).append(item.get('rating', 0))
         
-        # Filter meals based on calorie range
-        min_cals = target_calories * 0.25
-        max_cals = target_calories * 0.4
+        # Get dishes the user has rated before to avoid suggesting low-rated ones
+        rated_dishes = frozenset(history_ratings)
+        disliked_dishes = frozenset(dish for dish, ratings in history_ratings.items() if min(ratings) <= 3)
+        favorite_dishes = frozenset(dish for dish, ratings in history_ratings.items() if max(ratings) >= 7)
         
-        calorie_filtered = [meal for meal in all_meals if min_cals <= meal['estimated_cals'] <= max_cals]
+        # Get user preferences
+        user_preferences = preferences_future.result()
+        
+        # Bisect the calorie index for the slightly expanded range, then drop disliked dishes
+        # and collect the strict range from that window in one pass
+        expanded_min = max(min_cals - 50, 0)
+        expanded_max = max_cals + 50
+        catalogue_key = _fitness_catalogue_key(meal_type, cuisine_preference)
+        catalogue = _FITNESS_MEAL_CATALOGUE.get(catalogue_key, ())
+        sorted_cals, positions = _FITNESS_MEAL_CALORIE_INDEX.get(catalogue_key, ((), ()))
+        strict_range, expanded_range = [], []
+        # Walk the window in catalogue order: the past-favourites cut below depends on that order
+        for position in sorted(positions[bisect_left(sorted_cals, expanded_min):bisect_right(sorted_cals, expanded_max)]):
+            meal = catalogue[position]
+            if meal['dish'].lower() in disliked_dishes:
+                continue
+            expanded_range.append(meal)
+            if min_cals <= meal['estimated_cals'] <= max_cals:
+                strict_range.append(meal)
         
-        # If not enough meals in the strict calorie range, expand it slightly
-        if len(calorie_filtered) < 3:
-            expanded_min = max(min_cals - 50, 0)
-            expanded_max = max_cals + 50
-            calorie_filtered = [meal for meal in all_meals if expanded_min <= meal['estimated_cals'] <= expanded_max]
-            
-        # Get dishes the user has rated before to avoid suggesting low-rated ones
-        rated_dishes = {item.get('food', '').lower() for item in food_choices_history}
-        disliked_dishes = {item.get('food', '').lower() for item in food_choices_history if item.get('rating', 0) <= 3}
+        # If not enough meals in the strict calorie range, use the expanded one
+        calorie_filtered = strict_range if len(strict_range) >= 3 else expanded_range
 
         # Separate meals into new suggestions and past favorites
         new_suggestions = []
@@ -1052,12 +1404,9 @@ def get_personalized_meal_rotation(user_id: str, mongo_client, meal_type: str, t
 
         for meal in calorie_filtered:
             dish_name = meal.get('dish', '').lower()
-            if dish_name in disliked_dishes:
-                continue # Skip disliked dishes entirely
-
             if dish_name in rated_dishes:
                 # This is a past favorite, check if it was highly rated
-                if any(item.get('food', '').lower() == dish_name and item.get('rating', 0) >= 7 for item in food_choices_history):
+                if dish_name in favorite_dishes:
                     past_favorites.append(meal)
             else:
                 # This is a new suggestion
@@ -1067,20 +1416,18 @@ def get_personalized_meal_rotation(user_id: str, mongo_client, meal_type: str, t
         final_suggestions_list = new_suggestions + past_favorites[:3]
 
         # Score and sort the final list
-        scored_final_list = []
-        for meal in final_suggestions_list:
-            score = calculate_meal_preference_score(meal, user_preferences, food_choices_history)
-            scored_final_list.append((meal, score))
-        scored_final_list.sort(key=lambda x: x[1], reverse=True)
+        scored_final_list = rank_meals_by_preference(final_suggestions_list, user_preferences, food_choices_history)
 
         personalized_meals = []
+        seen_dishes = set()
         
         for meal, score in scored_final_list:
-            if meal.get('dish') in [s.get('dish') for s in personalized_meals]:
+            if meal.get('dish') in seen_dishes:
                 continue # Skip if already in the list
+            seen_dishes.add(meal.get('dish'))
             
             personalization_message = "Personalized suggestion"
-            is_rated_before = any(item.get('dish', '').lower() == meal.get('dish', '').lower() for item in food_choices_history)
+            is_rated_before = meal.get('dish', '').lower() in rated_dishes
             if is_rated_before:
                  personalization_message = "This is a past favorite (You rated it highly before!)."
 
@@ -1116,7 +1463,6 @@ def get_personalized_meal_rotation(user_id: str, mongo_client, meal_type: str, t
 
         return personalized_meals
         
-    except Exception as e:
-        min_cals = target_calories * 0.25
-        max_cals = target_calories * 0.4
+    except Exception:
+        logger.exception("Error building personalized meal rotation")
         return get_default_fitness_meals(meal_type, min_cals, max_cals)
@@ -1,19 +1,62 @@
 # users.py
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
 import streamlit as st
 import bcrypt
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, DuplicateKeyError
+from pymongo import ASCENDING, DESCENDING, MongoClient
+from pymongo.errors import ConnectionFailure, DuplicateKeyError, PyMongoError
+
+logger = logging.getLogger(__name__)
 
 # ======================================================================================
 # MongoDB Configuration
 # ======================================================================================
 
+# Shared client tuning: bounded pool, fail fast on an unreachable server, and retry
+# transient failures. Only zlib is requested: it ships with Python, while zstd and
+# snappy need extra packages this app doesn't depend on.
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": 50,
+    "minPoolSize": 10,
+    "maxIdleTimeMS": 60000,
+    "serverSelectionTimeoutMS": 3000,
+    "socketTimeoutMS": 5000,
+    "retryReads": True,
+    "retryWrites": True,
+    "compressors": "zlib",
+}
+
+# (collection, keys, unique) for each index; the unique username index goes last so a
+# failure building it (e.g. existing duplicates) can't stop the query indexes from being created
+_INDEXES = (
+    ("food_choices", [("user_id", ASCENDING), ("timestamp", ASCENDING)], False),
+    ("food_choices", [("user_id", ASCENDING), ("rating", DESCENDING), ("category", ASCENDING)], False),
+    ("fitness_goals", [("user_id", ASCENDING)], True),
+    ("fitness_meals", [("user_id", ASCENDING), ("timestamp", DESCENDING)], False),
+    # Unique usernames are what makes register_user's DuplicateKeyError check work
+    ("users", [("username", ASCENDING)], True),
+)
+
+def ensure_indexes(client):
+    """Creates the indexes behind the app's hot queries; create_index is a no-op when one already exists."""
+    db = client["food_agent_db"]
+    for collection_name, keys, unique in _INDEXES:
+        try:
+            db[collection_name].create_index(keys, unique=unique)
+        except PyMongoError:
+            # Missing indexes only make queries slower, so don't block startup or the other indexes on them
+            logger.exception("Error creating MongoDB index %s on %s", keys, collection_name)
+
 @st.cache_resource
 def get_mongo_client():
     try:
         # Connect to MongoDB using the connection string from Streamlit's secrets
-        client = MongoClient(st.secrets["MONGO_CONNECTION_STRING"])
+        client = MongoClient(st.secrets["MONGO_CONNECTION_STRING"], **MONGO_CLIENT_OPTIONS)
         client.admin.command('ping') # Check if connection is successful
+        ensure_indexes(client)
         return client
     except ConnectionFailure:
         st.error("Failed to connect to MongoDB. Please check your connection string in `.streamlit/secrets.toml` and ensure MongoDB is running.")
@@ -23,10 +66,14 @@ def get_mongo_client():
 # Password Hashing Functions
 # ======================================================================================
 
+# bcrypt work factor for new hashes (~2^12 key-schedule rounds). Existing hashes carry their own
+# cost, so changing this only affects passwords hashed afterwards.
+BCRYPT_ROUNDS = 12
+
 def hash_password(password):
     """Hashes a password using bcrypt."""
     # bcrypt generates a salt and hashes the password in one step
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
     return hashed.decode('utf-8')
 
 def verify_password(password, hashed_password):
@@ -34,6 +81,35 @@ def verify_password(password, hashed_password):
     # bcrypt handles the salt extraction automatically
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+# (username, keyed password digest, stored hash) -> bcrypt result. The digest is an HMAC under a
+# random per-process key, so the cache never holds anything usable to recover a password offline.
+_VERIFY_CACHE_KEY = secrets.token_bytes(32)
+_VERIFIED_LOGINS_MAX = 1024
+_verified_logins = {}
+# Streamlit serves each session on its own thread, so every access to the cache goes through this lock
+_verified_logins_lock = threading.Lock()
+
+def verify_password_cached(username, password, hashed_password):
+    """Verifies a password, reusing the bcrypt result for a repeated (user, password, stored hash)."""
+    password_digest = hmac.new(_VERIFY_CACHE_KEY, password.encode('utf-8'), hashlib.sha256).digest()
+    key = (username, password_digest, hashed_password)
+    with _verified_logins_lock:
+        result = _verified_logins.get(key)
+    if result is None:
+        # bcrypt runs outside the lock so one slow check doesn't hold up other logins
+        result = verify_password(password, hashed_password)
+        with _verified_logins_lock:
+            if len(_verified_logins) >= _VERIFIED_LOGINS_MAX:
+                _verified_logins.clear()
+            _verified_logins[key] = result
+    return result
+
+def forget_verified_logins(username):
+    """Drops cached password checks for a user, e.g. when they log out."""
+    with _verified_logins_lock:
+        for key in [key for key in _verified_logins if key[0] == username]:
+            del _verified_logins[key]
+
 # ======================================================================================
 # User Database Operations
 # ======================================================================================
@@ -59,10 +135,10 @@ def login_user(username, password):
     db = client["food_agent_db"]
     users_collection = db["users"]
     
-    user_data = users_collection.find_one({"username": username})
+    user_data = users_collection.find_one({"username": username}, {"password": 1, "_id": 0})
     
     if user_data:
-        if verify_password(password, user_data["password"]):
+        if verify_password_cached(username, password, user_data["password"]):
             return True
     return False
 